@@ -11,9 +11,13 @@ all variables before optimization, we create concrete prompts that can be safely
 mutated without breaking the template structure.
 """
 
+import asyncio
+import re
+import threading
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
-from supabase import create_client, Client
+from supabase import acreate_client, create_client, AsyncClient, Client
 
 from config import (
     SUPABASE_URL,
@@ -22,6 +26,14 @@ from config import (
 )
 
 
+# Skill IDs per .in_() query (keeps the PostgREST URL well under length limits)
+METADATA_CHUNK_SIZE = 100
+
+
+# Columns fetched for skill metadata (see _row_to_meta)
+_SKILL_COLUMNS = "id, name, description"
+
+
 # Difficulty descriptions (matches TypeScript llm-provider.ts)
 DIFFICULTY_DESCRIPTIONS = {
     1: "Basic recall, simple facts",
@@ -37,19 +49,57 @@ DIFFICULTY_DESCRIPTIONS = {
 }
 
 
+# Matches {{var}} and the optimizer's {{input.var}} form in a single pass
+_VAR_RE = re.compile(r"\{\{(input\.)?(skill_name|skill_description|difficulty|difficulty_description)\}\}")
+
+
+# Index-aligned view of DIFFICULTY_DESCRIPTIONS (slot 0 unused)
+_DIFFICULTY_DESCRIPTIONS_BY_LEVEL = (None,) + tuple(DIFFICULTY_DESCRIPTIONS[i] for i in range(1, 11))
+
+# Pre-rendered difficulty strings for levels 0-10
+_DIFFICULTY_STR = tuple(str(i) for i in range(11))
+
+
 def get_difficulty_description(difficulty: int) -> str:
     """Get description for a difficulty level."""
-    return DIFFICULTY_DESCRIPTIONS.get(difficulty, f"Difficulty level {difficulty}")
+    if 1 <= difficulty <= 10:
+        return _DIFFICULTY_DESCRIPTIONS_BY_LEVEL[difficulty]
+    return f"Difficulty level {difficulty}"
+
+
+# Shared Supabase client (see get_supabase_client)
+_supabase_client: Optional[Client] = None
+_SUPABASE_CLIENT_LOCK = threading.Lock()
 
 
 def get_supabase_client() -> Client:
-    """Create and return a Supabase client."""
+    """
+    Return the shared Supabase client.
+
+    The client is created on first use and reused afterwards so its HTTP
+    connection pool survives across metadata lookups.
+    """
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise ValueError(
             "Supabase credentials not configured. "
             "Set SUPABASE_URL and SUPABASE_KEY environment variables."
         )
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    global _supabase_client
+    # Locked so concurrent first calls can't each build their own client
+    with _SUPABASE_CLIENT_LOCK:
+        if _supabase_client is None:
+            _supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return _supabase_client
+
+
+def _row_to_meta(row: dict) -> dict:
+    """Shape a skills-table row as the metadata dict used throughout this module."""
+    return {
+        "skill_id": row["id"],
+        "skill_name": row["name"],
+        "skill_description": row["description"],
+    }
 
 
 def get_skill_metadata(skill_id: str) -> dict:
@@ -65,18 +115,85 @@ def get_skill_metadata(skill_id: str) -> dict:
     Raises:
         ValueError: If skill not found
     """
+    skill_meta = get_skills_metadata([skill_id]).get(skill_id)
+
+    if not skill_meta:
+        raise ValueError(f"Skill not found: {skill_id}")
+
+    return skill_meta
+
+
+def get_skills_metadata(skill_ids: list[str]) -> dict[str, dict]:
+    """
+    Fetch name and description for several skills.
+
+    IDs are sent in chunks of METADATA_CHUNK_SIZE per query to stay within
+    PostgREST URL-length limits (one query for typical inputs).
+
+    Args:
+        skill_ids: The UUIDs of the skills to fetch
+
+    Returns:
+        dict keyed by skill_id, each value shaped like get_skill_metadata().
+        Unknown IDs are simply absent from the result.
+    """
+    if not skill_ids:
+        return {}
+
     client = get_supabase_client()
 
-    result = client.table("skills").select("id, name, description").eq("id", skill_id).single().execute()
+    ids = list(skill_ids)
+    results = [
+        client.table("skills").select(_SKILL_COLUMNS).in_("id", ids[i:i + METADATA_CHUNK_SIZE]).execute()
+        for i in range(0, len(ids), METADATA_CHUNK_SIZE)
+    ]
 
-    if not result.data:
-        raise ValueError(f"Skill not found: {skill_id}")
+    return {row["id"]: _row_to_meta(row) for result in results for row in (result.data or [])}
 
-    return {
-        "skill_id": result.data["id"],
-        "skill_name": result.data["name"],
-        "skill_description": result.data["description"],
-    }
+
+async def aget_skills_metadata(
+    skill_ids: list[str],
+    client: Optional[AsyncClient] = None,
+) -> dict[str, dict]:
+    """
+    Async variant of get_skills_metadata.
+
+    IDs are split into chunks of METADATA_CHUNK_SIZE and the chunk queries
+    run concurrently with asyncio.gather.
+
+    Args:
+        skill_ids: The UUIDs of the skills to fetch
+        client: Optional async client; one is created (and closed again) if not provided
+
+    Returns:
+        dict keyed by skill_id, each value shaped like get_skill_metadata()
+    """
+    if not skill_ids:
+        return {}
+
+    owns_client = client is None
+    if owns_client:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise ValueError(
+                "Supabase credentials not configured. "
+                "Set SUPABASE_URL and SUPABASE_KEY environment variables."
+            )
+        # Async clients are bound to the running event loop, so not cached globally
+        client = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+
+    ids = list(skill_ids)
+    chunks = [ids[i:i + METADATA_CHUNK_SIZE] for i in range(0, len(ids), METADATA_CHUNK_SIZE)]
+    try:
+        results = await asyncio.gather(*(
+            client.table("skills").select(_SKILL_COLUMNS).in_("id", chunk).execute()
+            for chunk in chunks
+        ))
+    finally:
+        # Close the HTTP session of a client we created; caller-supplied clients stay open
+        if owns_client:
+            await client.postgrest.aclose()
+
+    return {row["id"]: _row_to_meta(row) for result in results for row in (result.data or [])}
 
 
 def list_skills() -> list[dict]:
@@ -88,23 +205,41 @@ def list_skills() -> list[dict]:
     """
     client = get_supabase_client()
 
-    result = client.table("skills").select("id, name, description").eq("active", True).execute()
+    result = client.table("skills").select(_SKILL_COLUMNS).eq("active", True).execute()
+
+    return [_row_to_meta(row) for row in (result.data or [])]
 
-    return [
-        {
-            "skill_id": skill["id"],
-            "skill_name": skill["name"],
-            "skill_description": skill["description"],
-        }
-        for skill in (result.data or [])
-    ]
+
+@lru_cache(maxsize=1)
+def _read_base_prompt(path_str: str, mtime_ns: int) -> str:
+    """Read the base prompt file. Cached per (path, mtime) so edits are picked up."""
+    # Raw read + single decode (read_text goes through a text-mode wrapper)
+    return Path(path_str).read_bytes().decode("utf-8")
 
 
 def load_base_prompt() -> str:
     """Load the base challenge prompt template."""
     if not BASE_PROMPT_PATH.exists():
         raise FileNotFoundError(f"Base prompt not found: {BASE_PROMPT_PATH}")
-    return BASE_PROMPT_PATH.read_text(encoding="utf-8")
+    return _read_base_prompt(str(BASE_PROMPT_PATH), BASE_PROMPT_PATH.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _tokenize_template(base_prompt: str) -> tuple[str, ...]:
+    """
+    Split a {{variable}} prompt into segments, once per distinct prompt.
+
+    Even indexes hold literal text and odd indexes hold variable names, so
+    rendering is a single join with no rescanning of the template.
+    """
+    segments = []
+    pos = 0
+    for match in _VAR_RE.finditer(base_prompt):
+        segments.append(base_prompt[pos:match.start()])
+        segments.append(match.group(2))
+        pos = match.end()
+    segments.append(base_prompt[pos:])
+    return tuple(segments)
 
 
 def bake_prompt(
@@ -136,25 +271,55 @@ def bake_prompt(
     if difficulty_description is None:
         difficulty_description = get_difficulty_description(difficulty)
 
-    # Replace all template variables with concrete values
-    baked = base_prompt
-    baked = baked.replace("{{skill_name}}", skill_name)
-    baked = baked.replace("{{skill_description}}", skill_description)
-    baked = baked.replace("{{difficulty}}", str(difficulty))
-    baked = baked.replace("{{difficulty_description}}", difficulty_description)
+    values = {
+        "skill_name": skill_name,
+        "skill_description": skill_description,
+        "difficulty": _DIFFICULTY_STR[difficulty] if 0 <= difficulty <= 10 else str(difficulty),
+        "difficulty_description": difficulty_description,
+    }
 
-    # Also handle the optimizer's {{input.X}} format (in case base prompt uses it)
-    baked = baked.replace("{{input.skill_name}}", skill_name)
-    baked = baked.replace("{{input.skill_description}}", skill_description)
-    baked = baked.replace("{{input.difficulty}}", str(difficulty))
+    # Template is tokenized once per base prompt; rendering is a single join
+    segments = _tokenize_template(base_prompt)
+    return "".join(values[seg] if i & 1 else seg for i, seg in enumerate(segments))
 
-    return baked
+
+def bake_prompt_for_skill_dict(
+    skill_meta: dict,
+    level: int,
+    base_prompt: Optional[str] = None,
+) -> str:
+    """
+    Bake a prompt from already-fetched skill metadata (no Supabase call).
+
+    This is the preferred batch path: iterate over list_skills() (or
+    get_skills_metadata()) and pass each dict straight through, instead of
+    calling bake_prompt_for_skill_level which fetches metadata again.
+
+    Args:
+        skill_meta: dict with skill_name and skill_description, as returned by list_skills()
+        level: The difficulty level (1-10)
+        base_prompt: Optional custom base prompt, defaults to loading from file
+
+    Returns:
+        A concrete prompt string with all variables replaced
+    """
+    return bake_prompt(
+        skill_name=skill_meta["skill_name"],
+        skill_description=skill_meta["skill_description"],
+        difficulty=level,
+        base_prompt=base_prompt,
+    )
 
 
 def bake_prompt_for_skill_level(skill_id: str, level: int) -> str:
     """
     Convenience function to fetch skill metadata and bake a prompt in one call.
 
+    Skill metadata is memoized per skill_id for the lifetime of the process,
+    so repeat calls skip the Supabase round-trip. Rendering is not memoized:
+    the base prompt is re-read whenever challenge_base.txt changes, and the
+    render itself is a single join over the cached template tokens.
+
     Args:
         skill_id: The UUID of the skill
         level: The difficulty level (1-10)
@@ -162,10 +327,98 @@ def bake_prompt_for_skill_level(skill_id: str, level: int) -> str:
     Returns:
         A concrete prompt string with all variables replaced
     """
+    return bake_prompt_for_skill_dict(_get_skill_metadata_cached(skill_id), level)
+
+
+@lru_cache(maxsize=1024)
+def _get_skill_metadata_cached(skill_id: str) -> dict:
+    """Memoized get_skill_metadata for bake_prompt_for_skill_level (treat the result as read-only)."""
+    return get_skill_metadata(skill_id)
+
+
+def bake_all_levels(skill_id: str) -> dict[int, str]:
+    """
+    Bake prompts for every difficulty level (1-10) of a skill.
+
+    Skill metadata and the base prompt are loaded once and shared across
+    all levels, rather than once per level.
+
+    Args:
+        skill_id: The UUID of the skill
+
+    Returns:
+        dict mapping level -> concrete prompt string
+    """
     skill_meta = get_skill_metadata(skill_id)
+    base_prompt = load_base_prompt()
 
-    return bake_prompt(
-        skill_name=skill_meta["skill_name"],
-        skill_description=skill_meta["skill_description"],
-        difficulty=level,
-    )
+    return {
+        level: bake_prompt_for_skill_dict(skill_meta, level, base_prompt=base_prompt)
+        for level in DIFFICULTY_DESCRIPTIONS
+    }
+
+
+def _distinct_skill_ids(pairs: list[tuple[str, int]]) -> list[str]:
+    """Skill IDs appearing in (skill_id, level) pairs, de-duplicated in order."""
+    return list(dict.fromkeys(skill_id for skill_id, _ in pairs))
+
+
+def _bake_pairs(
+    pairs: list[tuple[str, int]],
+    metadata: dict[str, dict],
+) -> dict[tuple[str, int], str]:
+    """
+    Bake every (skill_id, level) pair from already-fetched metadata.
+
+    Shared by bake_many and abake_many, which differ only in how they fetch.
+
+    Raises:
+        ValueError: If any skill is missing from metadata
+    """
+    missing = [skill_id for skill_id in _distinct_skill_ids(pairs) if skill_id not in metadata]
+    if missing:
+        raise ValueError(f"Skill not found: {', '.join(missing)}")
+
+    base_prompt = load_base_prompt()
+    return {
+        (skill_id, level): bake_prompt_for_skill_dict(metadata[skill_id], level, base_prompt=base_prompt)
+        for skill_id, level in pairs
+    }
+
+
+def bake_many(pairs: list[tuple[str, int]]) -> dict[tuple[str, int], str]:
+    """
+    Bake prompts for many (skill_id, level) pairs.
+
+    Metadata for all distinct skills is fetched up front with one
+    get_skills_metadata query, then every pair is baked locally, so ten
+    levels of the same skill cost one Supabase round-trip, not ten.
+
+    Args:
+        pairs: List of (skill_id, level) tuples
+
+    Returns:
+        dict mapping (skill_id, level) -> concrete prompt string
+
+    Raises:
+        ValueError: If any skill is not found
+    """
+    if not pairs:
+        return {}
+    return _bake_pairs(pairs, get_skills_metadata(_distinct_skill_ids(pairs)))
+
+
+async def abake_many(pairs: list[tuple[str, int]]) -> dict[tuple[str, int], str]:
+    """
+    Async variant of bake_many.
+
+    Metadata for all distinct skills is fetched up front with
+    aget_skills_metadata, then every pair is baked locally.
+    Call from sync code with asyncio.run(abake_many(pairs)).
+
+    Raises:
+        ValueError: If any skill is not found
+    """
+    if not pairs:
+        return {}
+    return _bake_pairs(pairs, await aget_skills_metadata(_distinct_skill_ids(pairs)))
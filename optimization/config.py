@@ -4,6 +4,7 @@ Loads environment variables and sets up API clients.
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -53,6 +54,16 @@ EVALUATION_WEIGHTS = {
 # Quality threshold
 QUALITY_THRESHOLD = 0.7
 
+# Judge concurrency and rate limits (shared by all sync and async judge calls)
+JUDGE_MAX_CONCURRENCY = 8
+JUDGE_MAX_REQUESTS_PER_MINUTE = 50
+JUDGE_MAX_TOKENS_PER_MINUTE = 50_000
+JUDGE_MAX_ATTEMPTS = 5  # Includes the first try; 429/5xx are retried with backoff by the SDK
+
+# Default worker threads each Opik optimizer uses to evaluate dataset items.
+# Generation calls are not rate-limited, so stay serial unless --n-threads raises it.
+OPTIMIZER_N_THREADS = 1
+
 # Opik project name (must match TypeScript backend)
 OPIK_PROJECT_NAME = "skill-issue"
 
@@ -62,8 +73,14 @@ BASE_PROMPT_PATH = PROMPTS_DIR / "challenge_base.txt"
 OPTIMIZED_PROMPTS_PATH = PROMPTS_DIR / "optimized_prompts.json"
 
 
+@lru_cache(maxsize=2)
 def validate_config(require_supabase: bool = False):
-    """Validate that all required configuration is present."""
+    """
+    Validate that all required configuration is present.
+
+    Environment variables are fixed after startup, so a successful result is
+    cached per require_supabase value. Failures raise and are not cached.
+    """
     missing = []
 
     if not OPIK_API_KEY:
@@ -10,20 +10,36 @@ Evaluates generated challenges on 5 quality dimensions:
 - Skill Relevance: Does it test the stated skill?
 """
 
-import json
+import asyncio
+import hashlib
 import re
-from typing import TypedDict, Optional
-from anthropic import Anthropic
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, NamedTuple, Optional
+import orjson
+
+# anthropic/httpx are imported lazily so that importing this module (e.g. for
+# is_valid_challenge only) doesn't pull in the SDK
+if TYPE_CHECKING:
+    import httpx
+    from anthropic import Anthropic, AsyncAnthropic
 
 from config import (
     ANTHROPIC_API_KEY,
     JUDGE_MODEL_ANTHROPIC,
     EVALUATION_WEIGHTS,
     QUALITY_THRESHOLD,
+    JUDGE_MAX_CONCURRENCY,
+    JUDGE_MAX_REQUESTS_PER_MINUTE,
+    JUDGE_MAX_TOKENS_PER_MINUTE,
+    JUDGE_MAX_ATTEMPTS,
 )
 
 
-class EvaluationScores(TypedDict):
+class EvaluationScores(NamedTuple):
     clarity: float
     difficulty_alignment: float
     distractor_quality: float
@@ -31,31 +47,28 @@ class EvaluationScores(TypedDict):
     skill_relevance: float
 
 
-class EvaluationResult(TypedDict):
+@dataclass(slots=True, frozen=True)
+class EvaluationResult:
     scores: EvaluationScores
     composite_score: float
     passed: bool
     reasons: dict[str, str]
 
 
-# Evaluation prompt template (without example comparison)
-EVALUATION_PROMPT_TEMPLATE = """You are an expert educator evaluating the quality of a multiple-choice question.
+# Judge prompts keep the wording of the original single-prompt templates (and
+# packages/backend/src/lib/evaluator.ts), so scores stay comparable with stored
+# baselines. They are assembled from the sections below: the criteria are
+# interpolated with the skill and target difficulty, and the batched variant
+# reuses the same criteria for several challenges.
 
-## Challenge to Evaluate
-**Skill Being Tested**: {skill_name}
-**Skill Description**: {skill_description}
-**Target Difficulty**: {target_difficulty}/10
+# Opening line of every judge prompt
+JUDGE_INTRO = """You are an expert educator evaluating the quality of a multiple-choice question.
 
-**Question**: {question}
-**Options**:
-A) {option_0}
-B) {option_1}
-C) {option_2}
-D) {option_3}
-**Correct Answer**: {correct_letter}) {correct_option}
-**Explanation**: {explanation}
+"""
 
-## Evaluation Criteria
+
+# Evaluation criteria (without example comparison)
+EVALUATION_CRITERIA = """## Evaluation Criteria
 Rate each dimension from 0-10, where 0 is completely failing and 10 is excellent. Provide a brief reason for each score.
 
 1. **CLARITY**: Is the question clear and unambiguous? Could a competent person misinterpret what's being asked?
@@ -71,59 +84,289 @@ Rate each dimension from 0-10, where 0 is completely failing and 10 is excellent
 CRITICAL: You MUST return ALL 5 scores and ALL 5 reasons. Missing fields will invalidate the evaluation.
 
 Return ONLY valid JSON with no markdown formatting. Example format:
-{{"clarity": 7, "clarityReason": "The question is clear because...", "difficultyAlignment": 6, "difficultyReason": "The difficulty matches because...", "distractorQuality": 8, "distractorReason": "The distractors are good because...", "educationalValue": 7, "educationalReason": "The explanation teaches...", "skillRelevance": 9, "relevanceReason": "This tests the skill because...", "overall": "Good question with minor issues in X"}}
+{{"clarity": 7, "clarityReason": "The question is clear because...", "difficultyAlignment": 6, "difficultyReason": "The difficulty matches because...", "distractorQuality": 8, "distractorReason": "The distractors are good because...", "educationalValue": 7, "educationalReason": "The explanation teaches...", "skillRelevance": 9, "relevanceReason": "This tests the skill because...", "overall": "Good question with minor issues in X"}}"""
 
-Your response (JSON only, no other text):"""
 
+# Evaluation criteria WITH example comparison
+EVALUATION_CRITERIA_WITH_EXAMPLE = """## Evaluation Criteria
+Compare to the example above. Rate each dimension from 0-10, where 0 is completely failing and 10 is excellent (matching or exceeding the example quality). Provide a brief reason for each score.
 
-# Evaluation prompt template WITH example comparison
-EVALUATION_PROMPT_WITH_EXAMPLE = """You are an expert educator evaluating the quality of a multiple-choice question.
+1. **CLARITY**: Is the question as clear and unambiguous as the example?
 
-## Example (what a good challenge looks like for this skill+level):
-**Question**: {example_question}
-**Options**: {example_options}
-**Explanation**: {example_explanation}
+2. **DIFFICULTY_ALIGNMENT**: Does the question's complexity match the target difficulty of {target_difficulty}/10 as well as the example?
+
+3. **DISTRACTOR_QUALITY**: Are the wrong options as plausible and well-crafted as the example's distractors?
+
+4. **EDUCATIONAL_VALUE**: Does the explanation teach as effectively as the example's explanation?
 
-## Challenge to Evaluate
+5. **SKILL_RELEVANCE**: Does this question test "{skill_name}" as effectively as the example?
+
+CRITICAL: You MUST return ALL 5 scores and ALL 5 reasons. Missing fields will invalidate the evaluation.
+
+Return ONLY valid JSON with no markdown formatting. Example format:
+{{"clarity": 7, "clarityReason": "The question is clear because...", "difficultyAlignment": 6, "difficultyReason": "The difficulty matches because...", "distractorQuality": 8, "distractorReason": "The distractors are good because...", "educationalValue": 7, "educationalReason": "The explanation teaches...", "skillRelevance": 9, "relevanceReason": "This tests the skill because...", "overall": "Good question with minor issues in X"}}"""
+
+
+# Single-challenge prompt (follows the intro and optional example)
+CHALLENGE_TEMPLATE = """## Challenge to Evaluate
 **Skill Being Tested**: {skill_name}
 **Skill Description**: {skill_description}
 **Target Difficulty**: {target_difficulty}/10
 
-**Question**: {question}
+{challenge_fields}
+
+{criteria}
+
+Your response (JSON only, no other text):"""
+
+
+# Prompt for judging several challenges in one call (see evaluate_batch)
+BATCH_CHALLENGE_TEMPLATE = """## Challenges to Evaluate
+**Skill Being Tested**: {skill_name}
+**Skill Description**: {skill_description}
+**Target Difficulty**: {target_difficulty}/10
+
+{challenges}
+
+{criteria}
+
+Evaluate each of the {count} challenges above independently, using these criteria and the JSON object format shown. Return a JSON array of exactly {count} objects, one per challenge, in the same order.
+
+Your response (JSON array only, no other text):"""
+
+
+# Fields of one challenge being evaluated
+CHALLENGE_FIELDS_TEMPLATE = """**Question**: {question}
 **Options**:
 A) {option_0}
 B) {option_1}
 C) {option_2}
 D) {option_3}
 **Correct Answer**: {correct_letter}) {correct_option}
-**Explanation**: {explanation}
+**Explanation**: {explanation}"""
 
-## Evaluation Criteria
-Compare to the example above. Rate each dimension from 0-10, where 0 is completely failing and 10 is excellent (matching or exceeding the example quality). Provide a brief reason for each score.
 
-1. **CLARITY**: Is the question as clear and unambiguous as the example?
+# Example section, placed before the challenge(s) when comparing
+EXAMPLE_TEMPLATE = """## Example (what a good challenge looks like for this skill+level):
+**Question**: {example_question}
+**Options**: {example_options}
+**Explanation**: {example_explanation}
 
-2. **DIFFICULTY_ALIGNMENT**: Does the question's complexity match the target difficulty of {target_difficulty}/10 as well as the example?
+"""
 
-3. **DISTRACTOR_QUALITY**: Are the wrong options as plausible and well-crafted as the example's distractors?
 
-4. **EDUCATIONAL_VALUE**: Does the explanation teach as effectively as the example's explanation?
+# Output token budget per judge call (a full judge reply is ~300 tokens)
+JUDGE_MAX_TOKENS = 512
 
-5. **SKILL_RELEVANCE**: Does this question test "{skill_name}" as effectively as the example?
+# Sampling temperature for the judge (0 keeps scores reproducible, so cache hits are meaningful)
+JUDGE_TEMPERATURE = 0.0
 
-CRITICAL: You MUST return ALL 5 scores and ALL 5 reasons. Missing fields will invalidate the evaluation.
+# Challenges per judge call in evaluate_batch
+JUDGE_BATCH_SIZE = 8
 
-Return ONLY valid JSON with no markdown formatting. Example format:
-{{"clarity": 7, "clarityReason": "The question is clear because...", "difficultyAlignment": 6, "difficultyReason": "The difficulty matches because...", "distractorQuality": 8, "distractorReason": "The distractors are good because...", "educationalValue": 7, "educationalReason": "The explanation teaches...", "skillRelevance": 9, "relevanceReason": "This tests the skill because...", "overall": "Good question with minor issues in X"}}
+# How long JudgeBatcher holds the first queued challenge waiting for others to join
+JUDGE_BATCH_MAX_WAIT_SECONDS = 0.05
 
-Your response (JSON only, no other text):"""
+# Max judge results kept in the per-evaluator response cache
+JUDGE_CACHE_SIZE = 4096
+
+# Connection pool for judge HTTP traffic (HTTP/2 multiplexes concurrent calls)
+JUDGE_HTTP_MAX_CONNECTIONS = 100
+JUDGE_HTTP_MAX_KEEPALIVE = 50
+JUDGE_HTTP_TIMEOUT_SECONDS = 60.0
+JUDGE_HTTP_CONNECT_TIMEOUT_SECONDS = 10.0
+
+
+def _http_client_options() -> dict:
+    """Keyword arguments shared by the sync and async judge HTTP clients."""
+    import httpx
+
+    return {
+        "http2": True,
+        "limits": httpx.Limits(
+            max_connections=JUDGE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=JUDGE_HTTP_MAX_KEEPALIVE,
+        ),
+        "timeout": httpx.Timeout(JUDGE_HTTP_TIMEOUT_SECONDS, connect=JUDGE_HTTP_CONNECT_TIMEOUT_SECONDS),
+    }
+
+
+# Composite weights, index-aligned with the EvaluationScores fields
+_WEIGHTS = tuple(EVALUATION_WEIGHTS[field] for field in EvaluationScores._fields)
+
+# Answer letters by option index, and padding for challenges with missing options
+_LETTERS = ("A", "B", "C", "D")
+_EMPTY_OPTS = ("", "", "", "")
+
+# Scores for an evaluation that produced no usable judgement
+_ZERO_SCORES = EvaluationScores(0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+# Judge response extraction (fallback when the reply is not bare JSON)
+_CODE_BLOCK_RE = re.compile(r"```(?:json)?\n?(.*?)\n?```\s*$", re.DOTALL)
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+
+# Judge fields (lowercased) needed for scoring; "overall" is optional
+_REQUIRED_JUDGE_FIELDS = frozenset({
+    "clarity", "clarityreason",
+    "difficultyalignment", "difficultyreason",
+    "distractorquality", "distractorreason",
+    "educationalvalue", "educationalreason",
+    "skillrelevance", "relevancereason",
+})
+
+
+def _early_json(partial: str) -> Optional[str]:
+    """
+    Close a partially streamed JSON object if it already holds every required field.
+
+    Called at "," boundaries: the text up to the last comma is a complete run
+    of key/value pairs, so appending "}" yields valid JSON. Returns the closed
+    object as a string, or None if it doesn't parse or fields are missing.
+    """
+    start = partial.find("{")
+    if start == -1:
+        return None
+    candidate = partial[start:partial.rfind(",")] + "}"
+    try:
+        parsed = orjson.loads(candidate)
+    except orjson.JSONDecodeError:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    if not _REQUIRED_JUDGE_FIELDS <= {str(k).lower() for k in parsed}:
+        return None
+    return candidate
+
+
+def _cache_key(prompt: str) -> str:
+    """Hash a judge prompt (whitespace-normalized) into a response-cache key."""
+    canonical = " ".join(prompt.split())
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _RateLimiter:
+    """
+    Token-bucket limiter for requests-per-minute and tokens-per-minute.
+
+    The bucket is guarded by a threading lock rather than an asyncio one, so a
+    single limiter can be shared by successive asyncio.run() calls (each with
+    its own event loop) and by the optimizer's sync judge threads.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        self._requests = min(
+            self.requests_per_minute,
+            self._requests + elapsed * self.requests_per_minute / 60,
+        )
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + elapsed * self.tokens_per_minute / 60,
+        )
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Consume one request and `tokens` tokens if available; otherwise return seconds to wait."""
+        with self._lock:
+            self._refill()
+            if self._requests >= 1 and self._tokens >= tokens:
+                self._requests -= 1
+                self._tokens -= tokens
+                return 0.0
+            return max(
+                (1 - self._requests) * 60 / self.requests_per_minute,
+                (tokens - self._tokens) * 60 / self.tokens_per_minute,
+                0.01,
+            )
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one request and `tokens` tokens are available, then consume them."""
+        tokens = min(tokens, self.tokens_per_minute)
+        # Sleep outside the lock so other loops/threads can refill and check too
+        while (wait := self._try_acquire(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, tokens: int) -> None:
+        """Blocking variant of acquire() for the sync judge path."""
+        tokens = min(tokens, self.tokens_per_minute)
+        while (wait := self._try_acquire(tokens)) > 0:
+            time.sleep(wait)
 
 
 class ChallengeEvaluator:
     """LLM-as-Judge evaluator for challenge quality."""
 
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = Anthropic(api_key=api_key or ANTHROPIC_API_KEY)
+    def __init__(self, api_key: Optional[str] = None, temperature: float = JUDGE_TEMPERATURE):
+        self._api_key = api_key or ANTHROPIC_API_KEY
+        self._temperature = temperature
+        # Sync Anthropic client is built on first use (see client); async clients
+        # are per evaluate_many() call since they are bound to the running event loop
+        self._client: Optional["Anthropic"] = None
+        # RPM/TPM buckets shared by every evaluate_many() call, keyed by (rpm, tpm)
+        self._rate_limiters: dict[tuple[int, int], _RateLimiter] = {}
+        # Exact-match cache: identical judge prompts reuse the earlier result
+        self._cache: OrderedDict[str, EvaluationResult] = OrderedDict()
+        # The optimizer calls evaluate() from several threads at once
+        self._cache_lock = threading.Lock()
+        # Caps in-flight sync judge calls across all optimizer threads
+        self._judge_slots = threading.BoundedSemaphore(JUDGE_MAX_CONCURRENCY)
+
+    @property
+    def client(self) -> "Anthropic":
+        """Sync Anthropic client, sharing one pooled HTTP/2 connection set across evaluators."""
+        if self._client is None:
+            from anthropic import Anthropic
+
+            # SDK retries 429/5xx/connection errors with exponential backoff
+            self._client = Anthropic(
+                api_key=self._api_key,
+                max_retries=JUDGE_MAX_ATTEMPTS - 1,
+                http_client=get_http_client(),
+            )
+        return self._client
+
+    def _new_async_client(self) -> "AsyncAnthropic":
+        """
+        Build an async Anthropic client with its own pooled HTTP/2 connections.
+
+        Not cached: its connections belong to the event loop that opens them,
+        so each evaluate_many() call creates one and closes it on the way out.
+        """
+        from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+        # SDK retries 429/5xx/connection errors with exponential backoff
+        return AsyncAnthropic(
+            api_key=self._api_key,
+            max_retries=JUDGE_MAX_ATTEMPTS - 1,
+            http_client=DefaultAsyncHttpxClient(**_http_client_options()),
+        )
+
+    def _throttle(self, prompt: str, max_tokens: int) -> None:
+        """Block until the shared RPM/TPM budget allows one more sync judge call."""
+        limiter = self._rate_limiter(JUDGE_MAX_REQUESTS_PER_MINUTE, JUDGE_MAX_TOKENS_PER_MINUTE)
+        # Rough token estimate: ~4 chars per input token plus the output budget
+        limiter.acquire_sync(len(prompt) // 4 + max_tokens)
+
+    def _rate_limiter(self, requests_per_minute: int, tokens_per_minute: int) -> _RateLimiter:
+        """Return the shared limiter for these limits, creating it on first use."""
+        with self._cache_lock:
+            key = (requests_per_minute, tokens_per_minute)
+            limiter = self._rate_limiters.get(key)
+            if limiter is None:
+                limiter = self._rate_limiters[key] = _RateLimiter(requests_per_minute, tokens_per_minute)
+            return limiter
 
     def evaluate(
         self,
@@ -132,6 +375,7 @@ class ChallengeEvaluator:
         skill_description: str,
         target_difficulty: int,
         example: Optional[dict] = None,
+        use_cache: bool = True,
     ) -> EvaluationResult:
         """
         Evaluate a generated challenge using LLM-as-Judge.
@@ -143,6 +387,7 @@ class ChallengeEvaluator:
             skill_description: Description of the skill
             target_difficulty: Target difficulty level (1-10)
             example: Optional example challenge for quality comparison
+            use_cache: Reuse (and store) results for identical judge prompts
         """
         prompt = self._build_prompt(
             challenge=challenge,
@@ -152,21 +397,274 @@ class ChallengeEvaluator:
             example=example,
         )
 
-        try:
-            message = self.client.messages.create(
-                model=JUDGE_MODEL_ANTHROPIC,
-                max_tokens=1024,
-                temperature=0.3,  # Lower temperature for consistent evaluation
-                messages=[{"role": "user", "content": prompt}],
-            )
+        key = _cache_key(prompt) if use_cache else None
+        if key is not None:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
 
-            response_text = message.content[0].text if message.content else ""
-            return self._parse_response(response_text)
+        try:
+            with self._judge_slots:
+                self._throttle(prompt, JUDGE_MAX_TOKENS)
+                response_text = self._stream_judge(prompt)
+            result = self._parse_response(response_text)
+            return self._cache_put(key, result) if key is not None else result
 
         except Exception as e:
             print(f"[Evaluator] Evaluation failed: {e}")
             return self._create_failed_evaluation(str(e))
 
+    async def evaluate_many(
+        self,
+        challenges: list[dict],
+        skill_name: str,
+        skill_description: str,
+        target_difficulty: int,
+        example: Optional[dict] = None,
+        max_concurrency: int = JUDGE_MAX_CONCURRENCY,
+        max_requests_per_minute: int = JUDGE_MAX_REQUESTS_PER_MINUTE,
+        max_tokens_per_minute: int = JUDGE_MAX_TOKENS_PER_MINUTE,
+        use_cache: bool = True,
+    ) -> list[EvaluationResult]:
+        """
+        Evaluate many challenges concurrently against the same skill+level.
+
+        Requests are bounded by a semaphore and throttled by an RPM/TPM token
+        bucket that is shared with every other evaluate_many() call on this
+        evaluator. Results are returned in the same order as `challenges`.
+        Call from sync code with asyncio.run(evaluator.evaluate_many(...)).
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limiter = self._rate_limiter(max_requests_per_minute, max_tokens_per_minute)
+
+        async with self._new_async_client() as client:
+            return await asyncio.gather(*(
+                self._evaluate_one(
+                    client,
+                    semaphore,
+                    limiter,
+                    challenge=challenge,
+                    skill_name=skill_name,
+                    skill_description=skill_description,
+                    target_difficulty=target_difficulty,
+                    example=example,
+                    use_cache=use_cache,
+                )
+                for challenge in challenges
+            ))
+
+    async def _evaluate_one(
+        self,
+        client: "AsyncAnthropic",
+        semaphore: asyncio.Semaphore,
+        limiter: _RateLimiter,
+        challenge: dict,
+        skill_name: str,
+        skill_description: str,
+        target_difficulty: int,
+        example: Optional[dict] = None,
+        use_cache: bool = True,
+    ) -> EvaluationResult:
+        """Evaluate a single challenge under the shared concurrency/rate limits."""
+        prompt = self._build_prompt(
+            challenge=challenge,
+            skill_name=skill_name,
+            skill_description=skill_description,
+            target_difficulty=target_difficulty,
+            example=example,
+        )
+
+        key = _cache_key(prompt) if use_cache else None
+        if key is not None:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
+        async with semaphore:
+            # Rough token estimate: ~4 chars per input token plus the output budget
+            await limiter.acquire(len(prompt) // 4 + JUDGE_MAX_TOKENS)
+            try:
+                response_text = await self._astream_judge(client, prompt)
+            except Exception as e:
+                print(f"[Evaluator] Evaluation failed: {e}")
+                return self._create_failed_evaluation(str(e))
+
+        result = self._parse_response(response_text)
+        return self._cache_put(key, result) if key is not None else result
+
+    def evaluate_batch(
+        self,
+        challenges: list[dict],
+        skill_name: str,
+        skill_description: str,
+        target_difficulty: int,
+        example: Optional[dict] = None,
+        batch_size: int = JUDGE_BATCH_SIZE,
+        examples: Optional[list[Optional[dict]]] = None,
+        use_cache: bool = True,
+    ) -> list[EvaluationResult]:
+        """
+        Evaluate several challenges with one judge call per `batch_size` items.
+
+        The criteria (and a shared example) are sent once per call instead of
+        once per challenge. If a batched reply can't be parsed into one result per
+        challenge, that batch falls back to per-item evaluate() calls; if the
+        call itself fails, its challenges get failed evaluations.
+        Results are returned in the same order as `challenges`.
+
+        Args:
+            example: Example shared by every challenge
+            examples: Per-challenge examples (overrides `example`); challenges
+                with and without an example are judged in separate calls since
+                they use different criteria
+            use_cache: Reuse (and store) results for identical judge prompts
+        """
+        if examples is None:
+            examples = [example] * len(challenges)
+
+        results: list[Optional[EvaluationResult]] = [None] * len(challenges)
+        # Pending indexes grouped by example/no-example, since the two use different criteria
+        pending: dict[str, list[tuple[int, Optional[str]]]] = {}
+
+        for i, challenge in enumerate(challenges):
+            prompt = self._build_prompt(
+                challenge=challenge,
+                skill_name=skill_name,
+                skill_description=skill_description,
+                target_difficulty=target_difficulty,
+                example=examples[i],
+            )
+            key = _cache_key(prompt) if use_cache else None
+            cached = self._cache_get(key) if key is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(self._has_example(examples[i]), []).append((i, key))
+
+        for group in pending.values():
+            for start in range(0, len(group), batch_size):
+                chunk = group[start:start + batch_size]
+                chunk_challenges = [challenges[i] for i, _ in chunk]
+                chunk_examples = [examples[i] for i, _ in chunk]
+
+                batch_results = self._judge_batch(
+                    chunk_challenges, skill_name, skill_description, target_difficulty, chunk_examples
+                )
+                if batch_results is None:
+                    batch_results = [
+                        self.evaluate(
+                            challenge, skill_name, skill_description, target_difficulty, chunk_example,
+                            use_cache=use_cache,
+                        )
+                        for challenge, chunk_example in zip(chunk_challenges, chunk_examples)
+                    ]
+
+                for (i, key), result in zip(chunk, batch_results):
+                    results[i] = self._cache_put(key, result) if key is not None else result
+
+        return results
+
+    def _judge_batch(
+        self,
+        challenges: list[dict],
+        skill_name: str,
+        skill_description: str,
+        target_difficulty: int,
+        examples: list[Optional[dict]],
+    ) -> Optional[list[EvaluationResult]]:
+        """
+        Judge a chunk of challenges in one call.
+
+        Returns None if the reply can't be parsed into one result per challenge,
+        so the caller can retry per item. API errors (including rate limits the
+        SDK already retried) return failed evaluations instead: splitting the
+        chunk into K single calls would only add load to a rejecting endpoint.
+        """
+        prompt = self._build_batch_prompt(
+            challenges=challenges,
+            skill_name=skill_name,
+            skill_description=skill_description,
+            target_difficulty=target_difficulty,
+            examples=examples,
+        )
+
+        try:
+            # Batched calls count against the same concurrency cap as single ones
+            with self._judge_slots:
+                max_tokens = JUDGE_MAX_TOKENS * len(challenges)
+                self._throttle(prompt, max_tokens)
+                message = self.client.messages.create(**self._request_params(prompt, max_tokens=max_tokens))
+        except Exception as e:
+            print(f"[Evaluator] Batch evaluation failed: {e}")
+            return [self._create_failed_evaluation(str(e)) for _ in challenges]
+
+        try:
+            response_text = message.content[0].text if message.content else ""
+            parsed = self._extract_json_array(response_text)
+            if len(parsed) != len(challenges) or not all(isinstance(item, dict) for item in parsed):
+                raise ValueError(f"Expected {len(challenges)} results, got {len(parsed)}")
+            return [self._result_from_parsed(item) for item in parsed]
+
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"[Evaluator] Batch reply unusable, falling back to single calls: {e}")
+            return None
+
+    def _cache_get(self, key: str) -> Optional[EvaluationResult]:
+        """Return a cached result and mark it most recently used."""
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+
+    def _cache_put(self, key: str, result: EvaluationResult) -> EvaluationResult:
+        """Store a result, evicting the least recently used entry when full."""
+        # Failed evaluations score 0 and are not cached so they get retried
+        if result.composite_score > 0:
+            with self._cache_lock:
+                self._cache[key] = result
+                if len(self._cache) > JUDGE_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _stream_judge(self, prompt: str) -> str:
+        """
+        Stream a judge reply, stopping as soon as every required field has arrived.
+
+        The trailing "overall" summary isn't needed for scoring, so the stream
+        is closed early instead of waiting for it.
+        """
+        text = ""
+        with self.client.messages.stream(**self._request_params(prompt)) as stream:
+            for chunk in stream.text_stream:
+                text += chunk
+                if "," in chunk:
+                    early = _early_json(text)
+                    if early is not None:
+                        return early
+        return text
+
+    async def _astream_judge(self, client: "AsyncAnthropic", prompt: str) -> str:
+        """Async variant of _stream_judge, on the caller's per-loop client."""
+        text = ""
+        async with client.messages.stream(**self._request_params(prompt)) as stream:
+            async for chunk in stream.text_stream:
+                text += chunk
+                if "," in chunk:
+                    early = _early_json(text)
+                    if early is not None:
+                        return early
+        return text
+
+    def _request_params(self, prompt: str, max_tokens: int = JUDGE_MAX_TOKENS) -> dict:
+        """Build the messages.create() arguments for a judge call."""
+        return {
+            "model": JUDGE_MODEL_ANTHROPIC,
+            "max_tokens": max_tokens,
+            "temperature": self._temperature,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+
     def _build_prompt(
         self,
         challenge: dict,
@@ -175,145 +673,201 @@ class ChallengeEvaluator:
         target_difficulty: int,
         example: Optional[dict] = None,
     ) -> str:
-        """Build the evaluation prompt from template."""
-        correct_index = challenge.get("correctAnswerIndex", 0)
-        options = challenge.get("options", ["", "", "", ""])
-        correct_letter = ["A", "B", "C", "D"][correct_index]
-
-        # Common fields for challenge being evaluated
-        base_fields = {
-            "skill_name": skill_name,
-            "skill_description": skill_description,
-            "target_difficulty": target_difficulty,
-            "question": challenge.get("question", ""),
-            "option_0": options[0] if len(options) > 0 else "",
-            "option_1": options[1] if len(options) > 1 else "",
-            "option_2": options[2] if len(options) > 2 else "",
-            "option_3": options[3] if len(options) > 3 else "",
-            "correct_letter": correct_letter,
-            "correct_option": options[correct_index] if correct_index < len(options) else "",
-            "explanation": challenge.get("explanation", "No explanation provided"),
-        }
+        """Build the evaluation prompt for one challenge."""
+        body = CHALLENGE_TEMPLATE.format(
+            skill_name=skill_name,
+            skill_description=skill_description,
+            target_difficulty=target_difficulty,
+            challenge_fields=self._format_challenge(challenge),
+            criteria=self._criteria(example, skill_name, target_difficulty),
+        )
+        return JUDGE_INTRO + self._format_example(example) + body
 
-        # Use example-comparison template if example provided
-        if example and example.get("question"):
-            example_options = example.get("options", [])
-            return EVALUATION_PROMPT_WITH_EXAMPLE.format(
-                **base_fields,
-                example_question=example.get("question", ""),
-                example_options=", ".join(example_options) if example_options else "",
-                example_explanation=example.get("explanation", ""),
-            )
+    def _build_batch_prompt(
+        self,
+        challenges: list[dict],
+        skill_name: str,
+        skill_description: str,
+        target_difficulty: int,
+        examples: list[Optional[dict]],
+    ) -> str:
+        """
+        Build a single prompt that judges several challenges.
+
+        A shared example is rendered once ahead of the challenges; when the
+        examples differ, each challenge is preceded by its own example.
+        """
+        shared = all(example == examples[0] for example in examples)
+        body = BATCH_CHALLENGE_TEMPLATE.format(
+            skill_name=skill_name,
+            skill_description=skill_description,
+            target_difficulty=target_difficulty,
+            count=len(challenges),
+            challenges="\n\n".join(
+                f"### Challenge {i}\n"
+                f"{'' if shared else self._format_example(example)}"
+                f"{self._format_challenge(challenge)}"
+                for i, (challenge, example) in enumerate(zip(challenges, examples), start=1)
+            ),
+            criteria=self._criteria(examples[0], skill_name, target_difficulty),
+        )
+        prefix = self._format_example(examples[0]) if shared else ""
+        return JUDGE_INTRO + prefix + body
+
+    def _has_example(self, example: Optional[dict]) -> bool:
+        """Whether an example is usable for comparison (it needs a question)."""
+        return bool(example and example.get("question"))
+
+    def _criteria(self, example: Optional[dict], skill_name: str, target_difficulty: int) -> str:
+        """Render the evaluation criteria (example-comparison variant if an example is given)."""
+        template = EVALUATION_CRITERIA_WITH_EXAMPLE if self._has_example(example) else EVALUATION_CRITERIA
+        return template.format(skill_name=skill_name, target_difficulty=target_difficulty)
+
+    def _format_example(self, example: Optional[dict]) -> str:
+        """Render the example section, or an empty string when there is none."""
+        if not self._has_example(example):
+            return ""
+        example_options = example.get("options", [])
+        return EXAMPLE_TEMPLATE.format(
+            example_question=example.get("question", ""),
+            example_options=", ".join(example_options) if example_options else "",
+            example_explanation=example.get("explanation", ""),
+        )
 
-        # Use standard template without example
-        return EVALUATION_PROMPT_TEMPLATE.format(**base_fields)
+    def _format_challenge(self, challenge: dict) -> str:
+        """Render the question, options, answer and explanation of one challenge."""
+        correct_index = challenge.get("correctAnswerIndex", 0)
+        # Pad to four options so every slot can be indexed directly
+        opts = (*challenge.get("options", _EMPTY_OPTS), *_EMPTY_OPTS)[:4]
+
+        return CHALLENGE_FIELDS_TEMPLATE.format(
+            question=challenge.get("question", ""),
+            option_0=opts[0],
+            option_1=opts[1],
+            option_2=opts[2],
+            option_3=opts[3],
+            correct_letter=_LETTERS[correct_index],
+            correct_option=opts[correct_index],
+            explanation=challenge.get("explanation", "No explanation provided"),
+        )
 
     def _parse_response(self, response: str) -> EvaluationResult:
         """Parse the LLM evaluation response into structured scores."""
         try:
-            # Strip markdown code blocks if present
-            cleaned = response
-            code_block_match = re.search(r"```(?:json)?\n?([\s\S]*)\n?```\s*$", response)
-            if code_block_match:
-                cleaned = code_block_match.group(1).strip()
-
-            # Extract JSON object
-            json_match = re.search(r"\{[\s\S]*\}", cleaned)
-            if not json_match:
-                raise ValueError("No JSON found in response")
-
-            parsed = json.loads(json_match.group(0))
-
-            # Extract raw scores (handle various naming conventions)
-            raw_scores = {
-                "clarity": parsed.get("clarity") or parsed.get("Clarity"),
-                "difficulty_alignment": (
-                    parsed.get("difficultyAlignment")
-                    or parsed.get("difficulty_alignment")
-                    or parsed.get("DIFFICULTY_ALIGNMENT")
-                ),
-                "distractor_quality": (
-                    parsed.get("distractorQuality")
-                    or parsed.get("distractor_quality")
-                    or parsed.get("DISTRACTOR_QUALITY")
-                ),
-                "educational_value": (
-                    parsed.get("educationalValue")
-                    or parsed.get("educational_value")
-                    or parsed.get("EDUCATIONAL_VALUE")
-                ),
-                "skill_relevance": (
-                    parsed.get("skillRelevance")
-                    or parsed.get("skill_relevance")
-                    or parsed.get("SKILL_RELEVANCE")
-                ),
-            }
-
-            # Normalize scores (0-10 from LLM -> 0-1)
-            scores: EvaluationScores = {
-                "clarity": self._normalize_score(raw_scores["clarity"]),
-                "difficulty_alignment": self._normalize_score(raw_scores["difficulty_alignment"]),
-                "distractor_quality": self._normalize_score(raw_scores["distractor_quality"]),
-                "educational_value": self._normalize_score(raw_scores["educational_value"]),
-                "skill_relevance": self._normalize_score(raw_scores["skill_relevance"]),
-            }
-
-            # Extract reasons
-            reasons = {
-                "clarity": parsed.get("clarityReason", "No reason provided"),
-                "difficulty_alignment": parsed.get("difficultyReason", "No reason provided"),
-                "distractor_quality": parsed.get("distractorReason", "No reason provided"),
-                "educational_value": parsed.get("educationalReason", "No reason provided"),
-                "skill_relevance": parsed.get("relevanceReason", "No reason provided"),
-                "overall": parsed.get("overall", "No overall summary"),
-            }
-
-            # Calculate weighted composite score
-            composite_score = self._calculate_composite(scores)
-            passed = composite_score >= QUALITY_THRESHOLD
-
-            return {
-                "scores": scores,
-                "composite_score": composite_score,
-                "passed": passed,
-                "reasons": reasons,
-            }
-
+            return self._result_from_parsed(self._extract_json(response))
         except Exception as e:
             print(f"[Evaluator] Failed to parse response: {e}")
             print(f"[Evaluator] Response was: {response[:500]}")
             return self._create_failed_evaluation(f"Parse error: {e}")
 
+    def _result_from_parsed(self, parsed: dict) -> EvaluationResult:
+        """Turn one parsed judge JSON object into an EvaluationResult."""
+        # Lowercase keys once so camelCase/snake_case/UPPER variants collapse
+        fields = {str(k).lower(): v for k, v in parsed.items()}
+
+        # Extract raw scores (handle various naming conventions)
+        raw_scores = {
+            "clarity": fields.get("clarity"),
+            "difficulty_alignment": fields.get("difficultyalignment") or fields.get("difficulty_alignment"),
+            "distractor_quality": fields.get("distractorquality") or fields.get("distractor_quality"),
+            "educational_value": fields.get("educationalvalue") or fields.get("educational_value"),
+            "skill_relevance": fields.get("skillrelevance") or fields.get("skill_relevance"),
+        }
+
+        # Normalize scores (0-10 from LLM -> 0-1)
+        scores = EvaluationScores(
+            clarity=self._normalize_score(raw_scores["clarity"]),
+            difficulty_alignment=self._normalize_score(raw_scores["difficulty_alignment"]),
+            distractor_quality=self._normalize_score(raw_scores["distractor_quality"]),
+            educational_value=self._normalize_score(raw_scores["educational_value"]),
+            skill_relevance=self._normalize_score(raw_scores["skill_relevance"]),
+        )
+
+        # Extract reasons
+        reasons = {
+            "clarity": fields.get("clarityreason", "No reason provided"),
+            "difficulty_alignment": fields.get("difficultyreason", "No reason provided"),
+            "distractor_quality": fields.get("distractorreason", "No reason provided"),
+            "educational_value": fields.get("educationalreason", "No reason provided"),
+            "skill_relevance": fields.get("relevancereason", "No reason provided"),
+            "overall": fields.get("overall", "No overall summary"),
+        }
+
+        # Calculate weighted composite score
+        composite_score = self._calculate_composite(scores)
+        passed = composite_score >= QUALITY_THRESHOLD
+
+        return EvaluationResult(
+            scores=scores,
+            composite_score=composite_score,
+            passed=passed,
+            reasons=reasons,
+        )
+
+    def _extract_json(self, response: str) -> dict:
+        """Pull the JSON object out of a judge response."""
+        # Happy path: the prompt asks for bare JSON, so try that before any regex
+        try:
+            parsed = orjson.loads(response)
+            if isinstance(parsed, dict):
+                return parsed
+        except orjson.JSONDecodeError:
+            pass
+
+        # Strip markdown code blocks if present
+        cleaned = response
+        code_block_match = _CODE_BLOCK_RE.search(response)
+        if code_block_match:
+            cleaned = code_block_match.group(1).strip()
+
+        # Extract JSON object
+        json_match = _JSON_OBJECT_RE.search(cleaned)
+        if not json_match:
+            raise ValueError("No JSON found in response")
+
+        return orjson.loads(json_match.group(0))
+
+    def _extract_json_array(self, response: str) -> list:
+        """Pull the JSON array out of a batched judge response."""
+        try:
+            parsed = orjson.loads(response)
+            if isinstance(parsed, list):
+                return parsed
+        except orjson.JSONDecodeError:
+            pass
+
+        cleaned = response
+        code_block_match = _CODE_BLOCK_RE.search(response)
+        if code_block_match:
+            cleaned = code_block_match.group(1).strip()
+
+        json_match = _JSON_ARRAY_RE.search(cleaned)
+        if not json_match:
+            raise ValueError("No JSON array found in response")
+
+        return orjson.loads(json_match.group(0))
+
     def _normalize_score(self, value) -> float:
-        """Normalize a 0-10 score to 0-1 range."""
-        if not isinstance(value, (int, float)):
+        """Normalize a 0-10 score to 0-1 range (missing/non-numeric/NaN -> 0)."""
+        try:
+            score = float(value)
+        except (TypeError, ValueError):
             return 0.0
-        clamped = max(0, min(10, value))
-        return clamped / 10
+        if not score > 0:
+            return 0.0
+        return 1.0 if score >= 10 else score / 10
 
     def _calculate_composite(self, scores: EvaluationScores) -> float:
         """Calculate weighted composite score from individual scores."""
-        return (
-            scores["clarity"] * EVALUATION_WEIGHTS["clarity"]
-            + scores["difficulty_alignment"] * EVALUATION_WEIGHTS["difficulty_alignment"]
-            + scores["distractor_quality"] * EVALUATION_WEIGHTS["distractor_quality"]
-            + scores["educational_value"] * EVALUATION_WEIGHTS["educational_value"]
-            + scores["skill_relevance"] * EVALUATION_WEIGHTS["skill_relevance"]
-        )
+        return sum(score * weight for score, weight in zip(scores, _WEIGHTS))
 
     def _create_failed_evaluation(self, reason: str) -> EvaluationResult:
         """Create a failed evaluation result."""
-        return {
-            "scores": {
-                "clarity": 0.0,
-                "difficulty_alignment": 0.0,
-                "distractor_quality": 0.0,
-                "educational_value": 0.0,
-                "skill_relevance": 0.0,
-            },
-            "composite_score": 0.0,
-            "passed": False,
-            "reasons": {
+        return EvaluationResult(
+            scores=_ZERO_SCORES,
+            composite_score=0.0,
+            passed=False,
+            reasons={
                 "clarity": reason,
                 "difficulty_alignment": reason,
                 "distractor_quality": reason,
@@ -321,7 +875,76 @@ class ChallengeEvaluator:
                 "skill_relevance": reason,
                 "overall": reason,
             },
-        }
+        )
+
+
+class JudgeBatcher:
+    """
+    Coalesce concurrent single-challenge evaluations into batched judge calls.
+
+    Optimizer threads score one challenge at a time. The first caller into an
+    empty queue waits up to `max_wait` seconds (or until `batch_size` requests
+    are queued), then judges the whole queue with evaluate_batch; every caller
+    blocks until its own result is ready. This trades a little latency for far
+    fewer requests against the provider's RPM limit.
+    """
+
+    def __init__(
+        self,
+        evaluator: ChallengeEvaluator,
+        skill_name: str,
+        skill_description: str,
+        target_difficulty: int,
+        batch_size: int = JUDGE_BATCH_SIZE,
+        max_wait: float = JUDGE_BATCH_MAX_WAIT_SECONDS,
+        use_cache: bool = True,
+    ):
+        self._evaluator = evaluator
+        self._skill_name = skill_name
+        self._skill_description = skill_description
+        self._target_difficulty = target_difficulty
+        self._batch_size = batch_size
+        self._max_wait = max_wait
+        self._use_cache = use_cache
+        self._pending: list[tuple[dict, Optional[dict], Future]] = []
+        self._cond = threading.Condition()
+
+    def evaluate(self, challenge: dict, example: Optional[dict] = None) -> EvaluationResult:
+        """Queue one challenge and block until its batch has been judged."""
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((challenge, example, future))
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self._batch_size:
+                self._cond.notify_all()
+
+        if leader:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) >= self._batch_size, timeout=self._max_wait)
+                # Take everything queued; evaluate_batch splits it into batch_size calls
+                batch, self._pending = self._pending, []
+            self._flush(batch)
+
+        return future.result()
+
+    def _flush(self, batch: list[tuple[dict, Optional[dict], Future]]) -> None:
+        """Judge a drained queue and resolve each caller's future."""
+        try:
+            results = self._evaluator.evaluate_batch(
+                [challenge for challenge, _, _ in batch],
+                self._skill_name,
+                self._skill_description,
+                self._target_difficulty,
+                batch_size=self._batch_size,
+                examples=[example for _, example, _ in batch],
+                use_cache=self._use_cache,
+            )
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
 
 
 def is_valid_challenge(challenge: dict) -> bool:
@@ -329,52 +952,68 @@ def is_valid_challenge(challenge: dict) -> bool:
     Validate that a challenge has the required structure.
     Matches validation in packages/backend/src/agents/agent2-challenge-design.ts
     """
-    # Check question exists and has minimum length
-    question = challenge.get("question", "")
-    if not question or len(question) < 10:
+    # Cheapest checks run first so invalid challenges exit early
+    # Check correct answer index
+    correct_index = challenge.get("correctAnswerIndex")
+    if not isinstance(correct_index, int) or not 0 <= correct_index <= 3:
         return False
 
-    # Enforce maximum character length (150 chars)
-    if len(question) > 150:
+    # Check options shape
+    options = challenge.get("options", [])
+    if not isinstance(options, list) or len(options) != 4:
         return False
 
-    # Enforce maximum word count (25 words)
-    question_words = len(question.strip().split())
-    if question_words > 25:
+    # Check question exists and is 10-150 chars
+    question = challenge.get("question", "")
+    if not isinstance(question, str) or not 10 <= len(question) <= 150:
         return False
 
-    # Check options
-    options = challenge.get("options", [])
-    if not isinstance(options, list) or len(options) != 4:
+    # Enforce maximum word count (25 words)
+    if len(question.split()) > 25:
         return False
 
-    for option in options:
-        if not option or len(str(option)) < 1:
-            return False
-        # Enforce word limit on options (12 words max)
-        option_words = len(str(option).strip().split())
-        if option_words > 12:
-            return False
-
-    # Check correct answer index
-    correct_index = challenge.get("correctAnswerIndex")
-    if not isinstance(correct_index, int) or correct_index < 0 or correct_index > 3:
+    # Every option non-empty and at most 12 words (str() only for non-strings)
+    if not all(
+        option and len((option if isinstance(option, str) else str(option)).split()) <= 12
+        for option in options
+    ):
         return False
 
-    # Check for duplicate options
-    if len(set(options)) != len(options):
+    # Check for duplicate options (length is already known to be 4)
+    try:
+        if len(set(options)) != 4:
+            return False
+    except TypeError:
+        # Unhashable options (nested lists/objects) aren't valid answers
         return False
 
     # Check explanation brevity (50 words max, if provided)
     explanation = challenge.get("explanation", "")
-    if explanation:
-        explanation_words = len(explanation.strip().split())
-        if explanation_words > 50:
-            return False
+    if explanation and (not isinstance(explanation, str) or len(explanation.split()) > 50):
+        return False
 
     return True
 
 
+# Shared HTTP client for sync judge calls
+_http_client: Optional["httpx.Client"] = None
+
+# Guards singleton creation; parallel levels resolve these from several threads at once
+_singleton_lock = threading.Lock()
+
+
+def get_http_client() -> "httpx.Client":
+    """Get or create the shared pooled HTTP/2 client used by Anthropic clients."""
+    global _http_client
+    if _http_client is None:
+        with _singleton_lock:
+            if _http_client is None:
+                from anthropic import DefaultHttpxClient
+
+                _http_client = DefaultHttpxClient(**_http_client_options())
+    return _http_client
+
+
 # Singleton instance
 _evaluator: Optional[ChallengeEvaluator] = None
 
@@ -383,5 +1022,7 @@ def get_evaluator() -> ChallengeEvaluator:
     """Get or create the evaluator singleton."""
     global _evaluator
     if _evaluator is None:
-        _evaluator = ChallengeEvaluator()
+        with _singleton_lock:
+            if _evaluator is None:
+                _evaluator = ChallengeEvaluator()
     return _evaluator
@@ -27,68 +27,160 @@ Usage:
 """
 
 import argparse
+import copy
+import hashlib
 import json
+import logging
+import math
 import os
+import stat
+import sys
+import tempfile
+import threading
 from datetime import datetime
-from pathlib import Path
+from functools import lru_cache
+from typing import Callable
 
-import litellm
 import opik
-from opik_optimizer import EvolutionaryOptimizer, MetaPromptOptimizer, ChatPrompt
-from opik_optimizer.algorithms.hierarchical_reflective_optimizer import HierarchicalReflectiveOptimizer
+import orjson
 from opik.evaluation.metrics.score_result import ScoreResult
 
-# Configure LiteLLM to automatically add dummy user messages for Anthropic
-# This fixes: "Anthropic requires at least one non-system message"
-litellm.modify_params = True
+# opik_optimizer (and litellm under it) is imported by _import_optimizer_libs(): it
+# takes seconds to load and --list-datasets / --list-skills never use it
 
 from config import (
     validate_config,
-    ANTHROPIC_API_KEY,
-    OPENAI_API_KEY,
     CHALLENGE_MODEL_LITELLM,
     OPIK_API_KEY,
     OPIK_WORKSPACE,
     OPIK_PROJECT_NAME,
     OPTIMIZED_PROMPTS_PATH,
     PROMPTS_DIR,
+    OPTIMIZER_N_THREADS,
 )
-from evaluator import get_evaluator, is_valid_challenge
+from evaluator import ChallengeEvaluator, JudgeBatcher, get_evaluator, is_valid_challenge
 from bake_prompt import (
-    bake_prompt_for_skill_level,
+    bake_prompt_for_skill_dict,
     get_skill_metadata,
     list_skills,
     get_difficulty_description,
-    DIFFICULTY_DESCRIPTIONS,
 )
 
 
-def extract_first_json_object(text: str) -> dict | None:
+# Per-evaluation metric output; lazy %-formatting is skipped below the active level
+# (DEBUG lines are hidden unless OPTIMIZER_LOG_LEVEL=DEBUG)
+_metric_log = logging.getLogger("optimize.metric")
+
+# Serializes read-modify-write of the optimized prompts file across level threads
+_SAVE_LOCK = threading.Lock()
+
+# Process umask, read once at import (before any threads exist): os.umask can only
+# be read by setting it, and changing it later would race with other threads' file writes
+_PROCESS_UMASK = os.umask(0)
+os.umask(_PROCESS_UMASK)
+
+# Set by configure_opik() once the SDK has been configured for this process
+_opik_configured = False
+_OPIK_CONFIGURE_LOCK = threading.Lock()
+
+# Shared Opik client (see get_opik_client)
+_opik_client: opik.Opik | None = None
+_OPIK_CLIENT_LOCK = threading.Lock()
+
+# Set by _import_optimizer_libs() once opik_optimizer/litellm are loaded and configured
+_optimizer_libs_loaded = False
+_OPTIMIZER_LIBS_LOCK = threading.Lock()
+
+# Shared decoder for extract_first_json_object (raw_decode stops at the end of one value)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def extract_first_json_object(
+    text: str,
+    required_key: str | None = None,
+    accept: Callable[[dict], bool] | None = None,
+) -> dict | None:
     """
     Extract the first valid JSON object from text.
     Handles cases with multiple JSON objects or extra content.
+
+    Args:
+        text: Raw LLM output
+        required_key: If set, the object must contain this key somewhere; used as a
+            cheap substring pre-check so outputs that can't match are never decoded
+        accept: If set, objects it rejects are skipped and scanning continues after
+            them (e.g. a {"thinking": ...} preamble before the real payload); an
+            exception from accept counts as a rejection. If no object is accepted,
+            the first decoded object is returned.
     """
-    depth = 0
-    start_idx = None
-
-    for i, char in enumerate(text):
-        if char == '{':
-            if depth == 0:
-                start_idx = i
-            depth += 1
-        elif char == '}':
-            depth -= 1
-            if depth == 0 and start_idx is not None:
-                try:
-                    candidate = text[start_idx:i+1]
-                    return json.loads(candidate)
-                except json.JSONDecodeError:
-                    start_idx = None
-                    continue
-    return None
+    # An object containing "key" must start before the key's last occurrence
+    limit = len(text)
+    if required_key is not None:
+        limit = text.rfind(f'"{required_key}"')
+        if limit == -1:
+            return None
+
+    # Happy path: the prompt asks for bare JSON, so try orjson on the whole output first
+    try:
+        obj = orjson.loads(text)
+        if isinstance(obj, dict):
+            # The whole output is this one object, so there is nothing else to try
+            return obj
+    except orjson.JSONDecodeError:
+        pass
+
+    # Jump between '{' candidates and let the C decoder find where each object ends.
+    # The decoder is string-aware, so braces inside "..." never split a candidate.
+    # On failure, resume after the error position: braces before it were nested in
+    # the rejected object, and skipping them keeps the whole scan linear.
+    first = None
+    idx = text.find("{", 0, limit)
+    while idx != -1:
+        try:
+            obj, end = _JSON_DECODER.raw_decode(text, idx)
+        except json.JSONDecodeError as e:
+            idx = text.find("{", max(e.pos, idx + 1), limit)
+            continue
+        if accept is None or _accepts(accept, obj):
+            return obj
+        if first is None:
+            first = obj
+        idx = text.find("{", end, limit)
+    return first
 
 
-def create_quality_metric(skill_name: str, skill_description: str, target_difficulty: int):
+def _accepts(accept: Callable[[dict], bool], obj: dict) -> bool:
+    """Run an accept() predicate, treating any exception as a rejection so scanning continues."""
+    try:
+        return bool(accept(obj))
+    except Exception:
+        return False
+
+
+def _pct_improvement(baseline: float, best: float) -> float:
+    """Percent change from baseline to best; 0 for a zero/invalid baseline or a non-finite result."""
+    if not baseline > 1e-9:
+        return 0.0
+    pct = (best - baseline) / baseline * 100.0
+    return pct if math.isfinite(pct) else 0.0
+
+
+def _metric_cache_key(dataset_item: dict, llm_output: str) -> bytes:
+    """Digest of the example challenge plus the generated output (the metric's only varying inputs)."""
+    example = orjson.dumps(dataset_item.get("expected_output", {}), option=orjson.OPT_SORT_KEYS)
+    digest = hashlib.blake2b(example, digest_size=16)
+    digest.update(llm_output.encode("utf-8"))
+    return digest.digest()
+
+
+def create_quality_metric(
+    skill_name: str,
+    skill_description: str,
+    target_difficulty: int,
+    use_cache: bool = True,
+    evaluator: ChallengeEvaluator | None = None,
+    judge_batch_size: int = 1,
+):
     """
     Factory function to create a metric with skill context baked in.
 
@@ -99,14 +191,37 @@ def create_quality_metric(skill_name: str, skill_description: str, target_diffic
     The dataset items now have empty `input` and example challenges in `expected_output`.
     The metric compares generated challenge quality against these examples.
 
+    Optimizers re-score identical outputs across generations, so scores are
+    cached per (example, llm_output) for the lifetime of the metric.
+
     Args:
         skill_name: The skill being tested
         skill_description: Description of the skill
         target_difficulty: The target difficulty level (1-10)
+        use_cache: Reuse scores for outputs already evaluated (False always calls the judge)
+        evaluator: Judge to use; defaults to the shared get_evaluator() instance
+        judge_batch_size: If > 1, concurrent metric calls are judged together in
+            batches of up to this many challenges (fewer judge requests)
 
     Returns:
         A metric function compatible with Opik optimizer
     """
+    # Resolved once here so every metric call reuses the same warm client
+    if evaluator is None:
+        evaluator = get_evaluator()
+
+    batcher = None
+    if judge_batch_size > 1:
+        batcher = JudgeBatcher(
+            evaluator,
+            skill_name=skill_name,
+            skill_description=skill_description,
+            target_difficulty=target_difficulty,
+            batch_size=judge_batch_size,
+            use_cache=use_cache,
+        )
+    score_cache: dict[bytes, ScoreResult] = {}
+
     def challenge_quality_metric(dataset_item: dict, llm_output: str) -> ScoreResult:
         """
         Metric function for the optimizer.
@@ -119,18 +234,26 @@ def create_quality_metric(skill_name: str, skill_description: str, target_diffic
 
         Returns ScoreResult with name, value (0-1), and reason for HRPO compatibility.
         """
+        if use_cache:
+            key = _metric_cache_key(dataset_item, llm_output)
+            cached = score_cache.get(key)
+            if cached is not None:
+                return cached
+
         # 1. Parse challenge JSON from LLM output
         try:
-            challenge = extract_first_json_object(llm_output)
+            challenge = extract_first_json_object(
+                llm_output, required_key="options", accept=is_valid_challenge
+            )
             if not challenge:
-                print(f"[Metric] No valid JSON found in output")
+                _metric_log.debug("No valid JSON found in output")
                 return ScoreResult(
                     name="challenge_quality",
                     value=0.0,
                     reason="No valid JSON found in LLM output"
                 )
         except Exception as e:
-            print(f"[Metric] JSON parse error: {e}")
+            _metric_log.debug("JSON parse error: %s", e)
             return ScoreResult(
                 name="challenge_quality",
                 value=0.0,
@@ -139,7 +262,7 @@ def create_quality_metric(skill_name: str, skill_description: str, target_diffic
 
         # 2. Basic validation
         if not is_valid_challenge(challenge):
-            print(f"[Metric] Challenge failed validation")
+            _metric_log.debug("Challenge failed validation")
             return ScoreResult(
                 name="challenge_quality",
                 value=0.0,
@@ -152,49 +275,112 @@ def create_quality_metric(skill_name: str, skill_description: str, target_diffic
         # 4. Run LLM-as-judge evaluation
         # Skill context comes from closure (optimization context), NOT from dataset item
         # This prevents data leakage where dataset hints inflate scores
-        evaluator = get_evaluator()
-
-        result = evaluator.evaluate(
-            challenge=challenge,
-            skill_name=skill_name,
-            skill_description=skill_description,
-            target_difficulty=target_difficulty,
-            example=example,  # Pass example for quality comparison
-        )
+        if batcher is not None:
+            result = batcher.evaluate(challenge, example)
+        else:
+            result = evaluator.evaluate(
+                challenge=challenge,
+                skill_name=skill_name,
+                skill_description=skill_description,
+                target_difficulty=target_difficulty,
+                example=example,  # Pass example for quality comparison
+                use_cache=use_cache,
+            )
 
         # Build detailed reason from evaluation scores
-        scores = result["scores"]
-        reasons = result.get("reasons", {})
-        reason_parts = [
-            f"Clarity: {scores['clarity']:.0%} - {reasons.get('clarity', 'N/A')}",
-            f"Difficulty: {scores['difficulty_alignment']:.0%} - {reasons.get('difficulty_alignment', 'N/A')}",
-            f"Distractors: {scores['distractor_quality']:.0%} - {reasons.get('distractor_quality', 'N/A')}",
-            f"Educational: {scores['educational_value']:.0%} - {reasons.get('educational_value', 'N/A')}",
-            f"Relevance: {scores['skill_relevance']:.0%} - {reasons.get('skill_relevance', 'N/A')}",
-        ]
-        detailed_reason = "; ".join(reason_parts)
+        scores = result.scores
+        reasons = result.reasons
+        detailed_reason = (
+            f"Clarity: {scores.clarity:.0%} - {reasons.get('clarity', 'N/A')}; "
+            f"Difficulty: {scores.difficulty_alignment:.0%} - {reasons.get('difficulty_alignment', 'N/A')}; "
+            f"Distractors: {scores.distractor_quality:.0%} - {reasons.get('distractor_quality', 'N/A')}; "
+            f"Educational: {scores.educational_value:.0%} - {reasons.get('educational_value', 'N/A')}; "
+            f"Relevance: {scores.skill_relevance:.0%} - {reasons.get('skill_relevance', 'N/A')}"
+        )
 
-        print(f"[Metric] Score: {result['composite_score']:.2f}, Passed: {result['passed']}")
-        return ScoreResult(
+        _metric_log.debug("Score: %.2f, Passed: %s", result.composite_score, result.passed)
+        score = ScoreResult(
             name="challenge_quality",
-            value=result["composite_score"],
+            value=result.composite_score,
             reason=detailed_reason
         )
+        # Judge failures score 0 and are left uncached so they get retried
+        if use_cache and result.composite_score > 0:
+            score_cache[key] = score
+        return score
 
     return challenge_quality_metric
 
 
+# In-process copy of the optimized prompts file as (mtime_ns, data).
+# save_optimized_prompt refreshes it after each write, so a sweep reads the file once.
+_prompts_cache: tuple[int, dict] | None = None
+
+
+def _read_optimized_prompts(mtime_ns: int) -> dict:
+    """
+    Parse the optimized prompts file, reusing the in-process copy while its mtime matches.
+
+    The returned dict is shared and must not be modified; save_optimized_prompt
+    works on a deep copy and swaps the cache only once the file is written.
+    """
+    global _prompts_cache
+    if _prompts_cache is None or _prompts_cache[0] != mtime_ns:
+        _prompts_cache = (mtime_ns, orjson.loads(OPTIMIZED_PROMPTS_PATH.read_bytes()))
+    return _prompts_cache[1]
+
+
 def load_optimized_prompts() -> dict:
     """Load existing optimized prompts from JSON file."""
     if OPTIMIZED_PROMPTS_PATH.exists():
-        with open(OPTIMIZED_PROMPTS_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _read_optimized_prompts(OPTIMIZED_PROMPTS_PATH.stat().st_mtime_ns)
     return {
         "prompts": {},
         "metadata": {"created_at": datetime.now().isoformat()}
     }
 
 
+@lru_cache(maxsize=1)
+def _index_optimized_prompts(mtime_ns: int) -> dict[tuple[str, int], dict]:
+    """
+    Flatten prompts[skill_id][level] into a (skill_id, level) -> entry index.
+
+    The nested on-disk layout is kept as-is because the TypeScript backend
+    reads it; the flat view is built once per file version for O(1) lookups.
+    """
+    # Snapshot under the save lock so a concurrent save can't swap the cache mid-build
+    with _SAVE_LOCK:
+        prompts = _read_optimized_prompts(mtime_ns).get("prompts", {})
+        return {
+            (skill_id, int(level)): entry
+            for skill_id, levels in prompts.items()
+            for level, entry in levels.items()
+        }
+
+
+def load_existing_optimized_prompt(skill_id: str, level: int) -> str | None:
+    """Return the pending or deployed optimized prompt for a skill+level, if any."""
+    if not OPTIMIZED_PROMPTS_PATH.exists():
+        return None
+    entry = _index_optimized_prompts(OPTIMIZED_PROMPTS_PATH.stat().st_mtime_ns).get((skill_id, level))
+    if entry and entry.get("status") in ("pending", "deployed"):
+        return entry.get("prompt")
+    return None
+
+
+def _prompts_file_mode() -> int:
+    """
+    Permission bits for a rewritten optimized prompts file.
+
+    Keeps the existing file's mode; a new file gets what open() would have
+    given it (0666 minus the process umask).
+    """
+    try:
+        return stat.S_IMODE(OPTIMIZED_PROMPTS_PATH.stat().st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_PROCESS_UMASK
+
+
 def save_optimized_prompt(
     skill_id: str,
     level: int,
@@ -204,46 +390,141 @@ def save_optimized_prompt(
     refinements: int,
 ) -> None:
     """Save the optimized prompt to JSON file with skill+level key."""
-    data = load_optimized_prompts()
-
-    # Ensure skill entry exists
-    if skill_id not in data["prompts"]:
-        data["prompts"][skill_id] = {}
-
-    # Add or update this skill+level's optimized prompt
-    # Note: prompt is already concrete (no variables) - ready for direct use
-    data["prompts"][skill_id][str(level)] = {
-        "prompt": optimized_prompt,
-        "baseline_score": baseline_score,
-        "best_score": best_score,
-        "improvement": best_score - baseline_score,
-        "improvement_percent": ((best_score - baseline_score) / baseline_score * 100) if baseline_score > 0 else 0,
-        "refinements": refinements,
-        "optimized_at": datetime.now().isoformat(),
-        "status": "pending",  # Can be: pending, deployed, disabled
-    }
-
-    data["metadata"]["last_updated"] = datetime.now().isoformat()
-    if "skills_optimized" not in data["metadata"]:
-        data["metadata"]["skills_optimized"] = []
-    if skill_id not in data["metadata"]["skills_optimized"]:
-        data["metadata"]["skills_optimized"].append(skill_id)
-
-    # Save
-    PROMPTS_DIR.mkdir(parents=True, exist_ok=True)
-    with open(OPTIMIZED_PROMPTS_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    global _prompts_cache
+
+    # Callers may save from several threads; the read-modify-write must not interleave
+    with _SAVE_LOCK:
+        # Work on a copy: the cached dict is shared with readers and must only
+        # change once the new file is actually on disk
+        data = copy.deepcopy(load_optimized_prompts())
+
+        # Ensure skill entry exists
+        if skill_id not in data["prompts"]:
+            data["prompts"][skill_id] = {}
+
+        # Add or update this skill+level's optimized prompt
+        # Note: prompt is already concrete (no variables) - ready for direct use
+        data["prompts"][skill_id][str(level)] = {
+            "prompt": optimized_prompt,
+            "baseline_score": baseline_score,
+            "best_score": best_score,
+            "improvement": best_score - baseline_score,
+            "improvement_percent": _pct_improvement(baseline_score, best_score),
+            "refinements": refinements,
+            "optimized_at": datetime.now().isoformat(),
+            "status": "pending",  # Can be: pending, deployed, disabled
+        }
+
+        data["metadata"]["last_updated"] = datetime.now().isoformat()
+        if "skills_optimized" not in data["metadata"]:
+            data["metadata"]["skills_optimized"] = []
+        if skill_id not in data["metadata"]["skills_optimized"]:
+            data["metadata"]["skills_optimized"].append(skill_id)
+
+        # Save via a temp file + rename so readers (and interrupted runs) never see a partial file.
+        # The temp name is unique so optimizer processes spawned side by side don't share it.
+        PROMPTS_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=PROMPTS_DIR, prefix=".optimized_prompts.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            os.chmod(tmp_name, _prompts_file_mode())  # mkstemp creates 0600
+            os.replace(tmp_name, OPTIMIZED_PROMPTS_PATH)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+        # data is exactly what was written, so the next load can skip re-reading it.
+        # Only reached after os.replace succeeded, so a failed save leaves the cache untouched.
+        _prompts_cache = (OPTIMIZED_PROMPTS_PATH.stat().st_mtime_ns, data)
 
     print(f"\n[Optimizer] Saved optimized prompt to: {OPTIMIZED_PROMPTS_PATH}")
     print(f"[Optimizer] Key: prompts.{skill_id}.{level}")
 
 
+def configure_opik() -> None:
+    """
+    Configure the Opik SDK, once per process.
+
+    Called at the start of every optimization run; only the first call does
+    any work, so --all-levels doesn't re-initialize the SDK for each level.
+
+    API keys are not copied into os.environ: config.py reads them from the
+    environment (populated by load_dotenv), so LiteLLM and the SDKs already
+    see them there.
+    """
+    global _opik_configured
+    with _OPIK_CONFIGURE_LOCK:
+        if _opik_configured:
+            return
+
+        # Project name must match the TypeScript backend, so it overrides any shell value
+        os.environ["OPIK_PROJECT_NAME"] = OPIK_PROJECT_NAME
+
+        opik.configure(
+            api_key=OPIK_API_KEY,
+            workspace=OPIK_WORKSPACE,
+            force=True,
+        )
+        _opik_configured = True
+        print(f"[Optimizer] Opik configured for project: {OPIK_PROJECT_NAME}")
+
+
+def _import_optimizer_libs() -> None:
+    """
+    Import opik_optimizer and litellm and configure litellm, once per process.
+
+    Call this from the main thread before any worker threads start: running
+    the first import of these packages concurrently on several threads risks
+    partially initialized modules and import-lock deadlocks.
+    """
+    global _optimizer_libs_loaded
+    with _OPTIMIZER_LIBS_LOCK:
+        if _optimizer_libs_loaded:
+            return
+
+        import litellm
+        import opik_optimizer.algorithms.hierarchical_reflective_optimizer  # noqa: F401
+
+        # Configure LiteLLM to automatically add dummy user messages for Anthropic
+        # This fixes: "Anthropic requires at least one non-system message"
+        litellm.modify_params = True
+        _optimizer_libs_loaded = True
+
+
+def configure_logging() -> None:
+    """Route metric logs to stdout with the [Metric] prefix, at OPTIMIZER_LOG_LEVEL (default INFO)."""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("[Metric] %(message)s"))
+    _metric_log.addHandler(handler)
+    _metric_log.propagate = False
+
+    # An unknown name (e.g. a typo like VERBOSE) falls back to INFO instead of crashing the run
+    level_name = (os.getenv("OPTIMIZER_LOG_LEVEL") or "INFO").upper()
+    level = logging.getLevelName(level_name)
+    if not isinstance(level, int):
+        print(f"[Warning] Unknown OPTIMIZER_LOG_LEVEL '{level_name}', using INFO")
+        level = logging.INFO
+    _metric_log.setLevel(level)
+
+
+def get_opik_client() -> opik.Opik:
+    """Get or create the Opik client singleton, so every run shares one connection pool."""
+    global _opik_client
+    with _OPIK_CLIENT_LOCK:
+        if _opik_client is None:
+            # Credentials passed directly; None falls back to the SDK's own config
+            _opik_client = opik.Opik(
+                project_name=OPIK_PROJECT_NAME,
+                workspace=OPIK_WORKSPACE,
+                api_key=OPIK_API_KEY,
+            )
+        return _opik_client
+
+
 def list_datasets() -> list[str]:
     """List all available skill datasets in Opik."""
-    os.environ["OPIK_API_KEY"] = OPIK_API_KEY or ""
-    os.environ["OPIK_WORKSPACE"] = OPIK_WORKSPACE or ""
-
-    client = opik.Opik()
+    client = get_opik_client()
     datasets = client.get_datasets()
 
     skill_datasets = []
@@ -274,7 +555,14 @@ def run_optimization(
     level: int,
     n_refinements: int = 5,
     optimizer_type: str = "evolutionary",
-) -> None:
+    use_cache: bool = True,
+    skill_meta: dict | None = None,
+    n_samples: int | None = None,
+    judge_batch_size: int = 1,
+    mutation_rate: float | None = None,
+    crossover_rate: float | None = None,
+    n_threads: int = OPTIMIZER_N_THREADS,
+) -> bool:
     """
     Run prompt optimization for a specific skill at a specific difficulty level.
 
@@ -290,6 +578,17 @@ def run_optimization(
         level: The difficulty level (1-10)
         n_refinements: Number of optimization iterations
         optimizer_type: Which optimizer to use ("evolutionary", "hrpo", or "metaprompt")
+        use_cache: Reuse judge scores for repeated outputs within the run
+        skill_meta: Optional pre-fetched skill metadata (skips the Supabase lookup)
+        n_samples: Dataset items evaluated per candidate prompt (default: full dataset)
+        judge_batch_size: Challenges judged per LLM-as-judge call (1 = one call each)
+        mutation_rate: Evolutionary optimizer mutation probability (default: library default)
+        crossover_rate: Evolutionary optimizer crossover probability (default: library default)
+        n_threads: Optimizer worker threads evaluating dataset items concurrently
+
+    Returns:
+        True if the optimization ran to completion, False if it stopped early
+        (skill metadata or dataset could not be loaded)
     """
     print(f"\n{'='*60}")
     print(f"Per-Skill-Per-Level Prompt Optimization")
@@ -297,6 +596,8 @@ def run_optimization(
     print(f"Skill ID: {skill_id}")
     print(f"Level: {level}")
     print(f"Refinements: {n_refinements}")
+    print(f"Samples: {n_samples or 'full dataset'}")
+    print(f"Threads: {n_threads}")
     print(f"Optimizer: {optimizer_type}")
     print(f"Dataset: example-based (GPT-4o generated)")
     print(f"{'='*60}\n")
@@ -304,36 +605,35 @@ def run_optimization(
     # Validate configuration (including Supabase for skill metadata)
     validate_config(require_supabase=True)
 
-    # Configure environment variables
-    os.environ["OPIK_API_KEY"] = OPIK_API_KEY
-    os.environ["OPIK_WORKSPACE"] = OPIK_WORKSPACE
-    os.environ["OPIK_PROJECT_NAME"] = OPIK_PROJECT_NAME
-    os.environ["ANTHROPIC_API_KEY"] = ANTHROPIC_API_KEY
-    os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
-
-    opik.configure(
-        api_key=OPIK_API_KEY,
-        workspace=OPIK_WORKSPACE,
-        force=True,
-    )
-    print(f"[Optimizer] Opik configured for project: {OPIK_PROJECT_NAME}")
+    # No-op when main() already loaded them
+    _import_optimizer_libs()
+    from opik_optimizer import EvolutionaryOptimizer, MetaPromptOptimizer, ChatPrompt
+    from opik_optimizer.algorithms.hierarchical_reflective_optimizer import HierarchicalReflectiveOptimizer
 
-    # Fetch skill metadata from Supabase
-    print(f"[Optimizer] Fetching skill metadata from Supabase...")
-    try:
-        skill_meta = get_skill_metadata(skill_id)
-        print(f"[Optimizer] Skill: {skill_meta['skill_name']}")
-        print(f"[Optimizer] Description: {skill_meta['skill_description'][:100]}...")
-    except Exception as e:
-        print(f"[Optimizer] Error fetching skill: {e}")
-        return
+    configure_opik()
+
+    # Fetch skill metadata from Supabase (unless the caller already has it)
+    if skill_meta is None:
+        print(f"[Optimizer] Fetching skill metadata from Supabase...")
+        try:
+            skill_meta = get_skill_metadata(skill_id)
+        except Exception as e:
+            print(f"[Optimizer] Error fetching skill: {e}")
+            return False
+    print(f"[Optimizer] Skill: {skill_meta['skill_name']}")
+    print(f"[Optimizer] Description: {skill_meta['skill_description'][:100]}...")
 
     # Bake the prompt with concrete values (NO template variables)
     print(f"\n[Optimizer] Baking prompt with concrete values...")
-    baked_prompt = bake_prompt_for_skill_level(skill_id, level)
+    # Reuse the metadata fetched above instead of a second Supabase round-trip
+    baked_prompt = bake_prompt_for_skill_dict(skill_meta, level)
     print(f"[Optimizer] Baked prompt length: {len(baked_prompt)} chars")
     print(f"[Optimizer] Difficulty description: {get_difficulty_description(level)}")
 
+    existing_prompt = load_existing_optimized_prompt(skill_id, level)
+    if existing_prompt:
+        print(f"[Optimizer] Existing optimized prompt found ({len(existing_prompt)} chars) - a new result will replace it")
+
     # Create ChatPrompt with the baked (concrete) prompt
     prompt = ChatPrompt(
         model=CHALLENGE_MODEL_LITELLM,
@@ -348,10 +648,12 @@ def run_optimization(
     print(f"\n[Optimizer] Loading dataset: {dataset_name}")
 
     try:
-        client = opik.Opik()
+        client = get_opik_client()
         dataset = client.get_dataset(name=dataset_name)
-        items = dataset.get_items()
-        item_count = len(list(items)) if items else 0
+        # The backend reports the count; only download items if it doesn't (older SDKs)
+        item_count = getattr(dataset, "dataset_items_count", None)
+        if item_count is None:
+            item_count = len(dataset.get_items())
         print(f"[Optimizer] Dataset loaded with {item_count} items")
     except Exception as e:
         print(f"[Optimizer] Error loading dataset: {e}")
@@ -362,7 +664,7 @@ def run_optimization(
         print(f"\n[Optimizer] Or generate all levels:")
         print(f"    POST /api/datasets/generate-all-levels")
         print(f"    Body: {{ \"skillId\": \"{skill_id}\" }}")
-        return
+        return False
 
     # Initialize optimizer based on type
     # Note: Seeds removed so each run explores different variations
@@ -373,7 +675,7 @@ def run_optimization(
         print(f"[Optimizer] Evaluation model: {CHALLENGE_MODEL_LITELLM} (for challenge generation)")
         optimizer = HierarchicalReflectiveOptimizer(
             model="gpt-4o",
-            n_threads=1,
+            n_threads=n_threads,
             batch_size=5,
             convergence_threshold=0.10,  # Higher threshold - keep exploring longer
             verbose=2,
@@ -385,19 +687,29 @@ def run_optimization(
         optimizer = MetaPromptOptimizer(
             model="gpt-4o",
             prompts_per_round=6,  # More candidates per round
-            n_threads=1,
+            n_threads=n_threads,
             verbose=2,
         )
     else:
         print(f"\n[Optimizer] Initializing EvolutionaryOptimizer...")
         print(f"[Optimizer] Mutation model: gpt-4o (for prompt mutations)")
         print(f"[Optimizer] Evaluation model: {CHALLENGE_MODEL_LITELLM} (for challenge generation)")
+        # Genetic operators: rates left unset fall back to the library defaults.
+        # MOO (score + prompt length), adaptive mutation and LLM crossover are on by default.
+        genetic_options = {}
+        if mutation_rate is not None:
+            genetic_options["mutation_rate"] = mutation_rate
+        if crossover_rate is not None:
+            genetic_options["crossover_rate"] = crossover_rate
+        if genetic_options:
+            print(f"[Optimizer] Genetic operators: {genetic_options}")
         optimizer = EvolutionaryOptimizer(
             model="gpt-4o",
-            n_threads=1,
+            n_threads=n_threads,
             population_size=6,  # Larger population for more diversity
             num_generations=5,  # More generations to evolve
             verbose=2,
+            **genetic_options,
         )
 
     # Create metric with skill context baked in
@@ -406,6 +718,9 @@ def run_optimization(
         skill_name=skill_meta["skill_name"],
         skill_description=skill_meta["skill_description"],
         target_difficulty=level,
+        use_cache=use_cache,
+        evaluator=get_evaluator(),
+        judge_batch_size=judge_batch_size,
     )
 
     # Run optimization
@@ -416,7 +731,7 @@ def run_optimization(
         prompt=prompt,
         dataset=dataset,
         metric=metric,
-        n_samples=None,  # Use full dataset
+        n_samples=n_samples,  # None = full dataset
         max_trials=n_refinements,
         project_name=OPIK_PROJECT_NAME,
         optimize_prompt=True,  # Allow modifying ALL roles (default only modifies system)
@@ -436,7 +751,7 @@ def run_optimization(
     print(f"\nInitial Score: {initial_score:.4f}")
     print(f"Best Score: {best_score:.4f}")
     improvement = best_score - initial_score
-    improvement_pct = (improvement / initial_score * 100) if initial_score > 0 else 0
+    improvement_pct = _pct_improvement(initial_score, best_score)
     print(f"Improvement: {improvement:.4f} ({improvement_pct:.1f}%)")
 
     # Save optimized prompt if improvement found
@@ -473,6 +788,7 @@ def run_optimization(
 
     print(f"\n[Optimizer] Check Opik dashboard for detailed traces and metrics.")
     print(f"[Optimizer] Project: {OPIK_PROJECT_NAME}")
+    return True
 
 
 def run_all_levels_optimization(
@@ -480,18 +796,37 @@ def run_all_levels_optimization(
     n_refinements: int = 5,
     levels: list[int] | None = None,
     optimizer_type: str = "evolutionary",
+    use_cache: bool = True,
+    n_samples: int | None = None,
+    judge_batch_size: int = 1,
+    mutation_rate: float | None = None,
+    crossover_rate: float | None = None,
+    n_threads: int = OPTIMIZER_N_THREADS,
 ) -> None:
     """
     Run optimization for all difficulty levels for a skill.
 
+    Levels run one after another: opik_optimizer keeps process-global state
+    (litellm callbacks, patched progress/report functions, logger levels,
+    DEAP creator classes), so concurrent runs in one process interfere.
+
     Args:
         skill_id: The skill ID to optimize for
         n_refinements: Number of optimization iterations per level
         levels: Optional list of specific levels to optimize (default: 1-10)
         optimizer_type: Which optimizer to use ("evolutionary", "hrpo", or "metaprompt")
+        use_cache: Reuse judge scores for repeated outputs within each level's run
+        n_samples: Dataset items evaluated per candidate prompt (default: full dataset)
+        judge_batch_size: Challenges judged per LLM-as-judge call (1 = one call each)
+        mutation_rate: Evolutionary optimizer mutation probability (default: library default)
+        crossover_rate: Evolutionary optimizer crossover probability (default: library default)
+        n_threads: Optimizer worker threads evaluating dataset items concurrently
     """
     if levels is None:
         levels = list(range(1, 11))
+    else:
+        # --levels 3,3 would otherwise optimize level 3 twice
+        levels = list(dict.fromkeys(levels))
 
     print(f"\n{'='*60}")
     print(f"Optimizing all levels for skill: {skill_id}")
@@ -499,21 +834,80 @@ def run_all_levels_optimization(
     print(f"Optimizer: {optimizer_type}")
     print(f"{'='*60}\n")
 
+    # Fetch skill metadata once and share it across levels
+    validate_config(require_supabase=True)
+    try:
+        skill_meta = get_skill_metadata(skill_id)
+    except Exception as e:
+        print(f"[Optimizer] Error fetching skill: {e}")
+        return
+
+    failed = []
     for level in levels:
+        print(f"\n{'='*40}")
+        print(f"LEVEL {level}/10")
+        print(f"{'='*40}")
         try:
-            print(f"\n{'='*40}")
-            print(f"LEVEL {level}/10")
-            print(f"{'='*40}")
-            run_optimization(skill_id, level, n_refinements, optimizer_type)
+            ok = run_optimization(
+                skill_id,
+                level,
+                n_refinements=n_refinements,
+                optimizer_type=optimizer_type,
+                use_cache=use_cache,
+                skill_meta=skill_meta,
+                n_samples=n_samples,
+                judge_batch_size=judge_batch_size,
+                mutation_rate=mutation_rate,
+                crossover_rate=crossover_rate,
+                n_threads=n_threads,
+            )
         except Exception as e:
             print(f"[Error] Failed to optimize level {level}: {e}")
-            continue
+            ok = False
+        if not ok:
+            failed.append(level)
 
     print(f"\n{'='*60}")
     print(f"ALL LEVELS OPTIMIZATION COMPLETE")
+    if failed:
+        print(f"Failed levels: {failed}")
     print(f"{'='*60}")
 
 
+def _parse_levels(value: str) -> list[int]:
+    """argparse type for --levels: comma-separated ints, each 1-10."""
+    try:
+        levels = [int(x.strip()) for x in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"levels must be comma-separated integers, got '{value}'")
+    invalid = [level for level in levels if not 1 <= level <= 10]
+    if invalid:
+        raise argparse.ArgumentTypeError(f"levels must be between 1 and 10, got {invalid}")
+    return levels
+
+
+def _parse_rate(value: str) -> float:
+    """argparse type for probabilities in [0, 1]."""
+    try:
+        rate = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"rate must be a number, got '{value}'")
+    if not 0.0 <= rate <= 1.0:
+        raise argparse.ArgumentTypeError(f"rate must be between 0 and 1, got {rate}")
+    return rate
+
+
+def _parse_positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"value must be an integer, got '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"value must be at least 1, got {number}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Optimize challenge generation prompts using Opik Agent Optimizer (per-skill-per-level)"
@@ -537,7 +931,7 @@ def main():
     )
     parser.add_argument(
         "--levels",
-        type=str,
+        type=_parse_levels,
         help="Comma-separated list of levels to optimize (e.g., '1,3,5,7')",
     )
     parser.add_argument(
@@ -546,6 +940,34 @@ def main():
         default=5,
         help="Number of optimization iterations (default: 5)",
     )
+    parser.add_argument(
+        "--n-samples",
+        type=_parse_positive_int,
+        default=None,
+        help="Dataset items to evaluate per candidate prompt (default: full dataset)",
+    )
+    parser.add_argument(
+        "--n-threads",
+        type=_parse_positive_int,
+        default=OPTIMIZER_N_THREADS,
+        help=f"Optimizer threads evaluating dataset items concurrently (default: {OPTIMIZER_N_THREADS})",
+    )
+    parser.add_argument(
+        "--judge-batch-size",
+        type=_parse_positive_int,
+        default=1,
+        help="Judge up to this many concurrent challenges per LLM-as-judge call (default: 1, no batching)",
+    )
+    parser.add_argument(
+        "--mutation-rate",
+        type=_parse_rate,
+        help="Mutation probability for the evolutionary optimizer, 0-1 (default: library default)",
+    )
+    parser.add_argument(
+        "--crossover-rate",
+        type=_parse_rate,
+        help="Crossover probability for the evolutionary optimizer, 0-1 (default: library default)",
+    )
     parser.add_argument(
         "--list-datasets",
         action="store_true",
@@ -563,8 +985,14 @@ def main():
         default="evolutionary",
         help="Which optimizer to use: evolutionary, hrpo, or metaprompt (default: evolutionary)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-run the LLM judge for every evaluation instead of reusing scores for repeated outputs",
+    )
 
     args = parser.parse_args()
+    configure_logging()
 
     if args.list_datasets:
         print("\nAvailable datasets:")
@@ -581,26 +1009,38 @@ def main():
     if not args.skill:
         parser.error("--skill is required unless using --list-datasets or --list-skills")
 
+    if not (args.all_levels or args.level):
+        parser.error("Either --level or --all-levels is required with --skill")
+
+    # Heavy optimizer imports happen once, on the main thread
+    _import_optimizer_libs()
+
     if args.all_levels:
-        # Parse specific levels if provided
-        levels = None
-        if args.levels:
-            levels = [int(x.strip()) for x in args.levels.split(",")]
         run_all_levels_optimization(
             skill_id=args.skill,
             n_refinements=args.refinements,
-            levels=levels,
+            levels=args.levels,
             optimizer_type=args.optimizer,
+            use_cache=not args.no_cache,
+            n_samples=args.n_samples,
+            judge_batch_size=args.judge_batch_size,
+            mutation_rate=args.mutation_rate,
+            crossover_rate=args.crossover_rate,
+            n_threads=args.n_threads,
         )
-    elif args.level:
+    else:
         run_optimization(
             skill_id=args.skill,
             level=args.level,
             n_refinements=args.refinements,
             optimizer_type=args.optimizer,
+            use_cache=not args.no_cache,
+            n_samples=args.n_samples,
+            judge_batch_size=args.judge_batch_size,
+            mutation_rate=args.mutation_rate,
+            crossover_rate=args.crossover_rate,
+            n_threads=args.n_threads,
         )
-    else:
-        parser.error("Either --level or --all-levels is required with --skill")
 
 
 if __name__ == "__main__":